@@ -1,22 +1,32 @@
+import base64
+import hashlib
+import io
 import json
+import os
 import subprocess
 import tempfile
+import threading
+import uuid
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
 
-import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.json as paj
 import streamlit as st
 
+try:  # orjson parses large ConvertTo-Json payloads several times faster; stdlib json is the fallback
+    import orjson as _json
+except ImportError:
+    _json = json
+
 st.set_page_config(page_title="Five9 Campaign Manager", layout="wide")
 
 
 # --- Setup for PowerShell execution and installation ---
 _INSTALL_DIR = Path(tempfile.gettempdir()) / "five9_installer"
 _INSTALL_DIR.mkdir(exist_ok=True)
-_INSTALL_STDOUT = _INSTALL_DIR / "stdout.txt"
-_INSTALL_STDERR = _INSTALL_DIR / "stderr.txt"
-_INSTALL_LOCK = _INSTALL_DIR / "running.lock"
+_INSTALL_STATUS = _INSTALL_DIR / "status.json"
 
 
 def ps_base_args(command: str) -> List[str]:
@@ -28,32 +38,183 @@ def ps_base_args(command: str) -> List[str]:
 def get_creation_flags() -> int:
     return subprocess.CREATE_NO_WINDOW if hasattr(subprocess, "CREATE_NO_WINDOW") else 0
 
+_PS_QUOTE_TABLE = str.maketrans({"'": "''"})
+
 def ps_escape(value: str) -> str:
-    return (value or "").replace("'", "''")
+    return (value or "").translate(_PS_QUOTE_TABLE)
+
+def _ps_array(items: Iterable[str]) -> str:
+    """PowerShell array literal of single-quoted, escaped names."""
+    return "@(" + ", ".join(f"'{ps_escape(i)}'" for i in items) + ")"
+
+def _ps_hashtable(mapping: Dict[str, List[str]]) -> str:
+    return "@{" + "; ".join(f"'{ps_escape(k)}' = {_ps_array(v)}" for k, v in mapping.items()) + "}"
+
+def hash_password(password: str) -> str:
+    return hashlib.sha256((password or "").encode("utf-8")).hexdigest()
+
+# Windows PowerShell 5.1 has no ForEach-Object -Parallel, so fan-out goes through a runspace pool
+# that lives as long as the host. Each pooled runspace connects to Five9 once, on its first job.
+_PS_PARALLEL_HELPER = """
+$global:Five9RunspaceInit = {
+    param($creds)
+    $global:ErrorActionPreference = 'Stop'
+    if (-not $global:Five9Connected) {
+        Connect-Five9AdminWebService -Credential $creds | Out-Null
+        $global:Five9Connected = $true
+    }
+}.ToString()
+function global:Invoke-Five9Parallel([object[]]$InputObject, [scriptblock]$ScriptBlock, $Shared) {
+    if (-not $global:Five9Pool) {
+        $global:Five9Pool = [RunspaceFactory]::CreateRunspacePool(1, 16)
+        $global:Five9Pool.Open()
+    }
+    $jobs = foreach ($item in $InputObject) {
+        $ps = [PowerShell]::Create()
+        $ps.RunspacePool = $global:Five9Pool
+        $null = $ps.AddScript($global:Five9RunspaceInit).AddArgument($global:creds).AddStatement()
+        $null = $ps.AddScript($ScriptBlock.ToString()).AddArgument($item).AddArgument($Shared)
+        [pscustomobject]@{ Item = $item; Shell = $ps; Handle = $ps.BeginInvoke() }
+    }
+    # A failed job (e.g. its runspace could not connect) becomes a failure record; every job is still
+    # awaited and disposed so nothing keeps changing Five9 after this returns.
+    foreach ($job in $jobs) {
+        try { $job.Shell.EndInvoke($job.Handle) }
+        catch {
+            $err = $_.Exception
+            if ($err.InnerException) { $err = $err.InnerException }
+            [pscustomobject]@{ Identifier = "$($job.Item)"; Success = $false; Error = $err.Message }
+        }
+        finally { $job.Shell.Dispose() }
+    }
+}
+"""
 
-def run_powershell_command(username: str, password: str, command: str) -> Tuple[str, str]:
-    safe_user, safe_pwd = ps_escape(username), ps_escape(password)
-    ps_script = f"""
-$ErrorActionPreference = 'Stop'
+# Sent once when the host starts. Every later command is a short Invoke-Batch call whose script travels
+# base64-encoded on a single line, so multi-line here-strings and non-ASCII names survive PowerShell's
+# line-by-line stdin reader; the sentinel lines delimit each reply on stdout.
+_PS_HOST_INIT = (
+    "[Console]::OutputEncoding = New-Object System.Text.UTF8Encoding $false; "
+    "function global:Invoke-Batch($id, $encoded) { "
+    "try { & ([scriptblock]::Create([Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($encoded)))) } "
+    "catch { Write-Output \"<<<ERR:$id>>>\"; Write-Output $_.Exception.Message } "
+    "finally { Write-Output \"<<<END:$id>>>\" } }"
+)
+
+class Five9PSHost:
+    """Long-lived powershell.exe kept connected to Five9; commands are fed over stdin
+    and each reply is read from stdout up to a per-command sentinel line."""
+
+    def __init__(self, username: str, password: str):
+        self.username, self._password = username, password
+        self._proc = None
+        self._lock = threading.RLock() # close() may be called from another session's rerun
+        self.connect_error = ""
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            ps_base_args("-"), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", errors="replace", bufsize=1, creationflags=get_creation_flags(),
+        )
+        self._write(_PS_HOST_INIT)
+        safe_user, safe_pwd = ps_escape(self.username), ps_escape(self._password)
+        _, self.connect_error = self._exchange(f"""
+$global:ErrorActionPreference = 'Stop'
 $secpasswd = ConvertTo-SecureString '{safe_pwd}' -AsPlainText -Force
-$creds = New-Object System.Management.Automation.PSCredential ('{safe_user}', $secpasswd)
-Connect-Five9AdminWebService -Credential $creds
-{command}
-"""
-    completed = subprocess.run(
-        ps_base_args(ps_script), capture_output=True, text=True, creationflags=get_creation_flags()
-    )
-    return completed.stdout.strip(), completed.stderr.strip()
+$global:creds = New-Object System.Management.Automation.PSCredential ('{safe_user}', $secpasswd)
+Connect-Five9AdminWebService -Credential $global:creds | Out-Null
+{_PS_PARALLEL_HELPER}
+""")
+
+    def _write(self, line: str):
+        self._proc.stdin.write(line + "\n")
+        self._proc.stdin.flush()
+
+    def _exchange(self, command: str) -> Tuple[str, str]:
+        tag = uuid.uuid4().hex
+        encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+        self._write(f"Invoke-Batch '{tag}' '{encoded}'")
+        out, err = [], []
+        target = out
+        for line in self._proc.stdout:
+            line = line.rstrip("\r\n")
+            if line == f"<<<END:{tag}>>>":
+                return "\n".join(out).strip(), "\n".join(err).strip()
+            if line == f"<<<ERR:{tag}>>>":
+                target = err
+            elif line.startswith("<<<END:"):
+                # Tail of a reply abandoned by an interrupted rerun; drop what was collected.
+                out, err = [], []
+                target = out
+            else:
+                target.append(line)
+        self.close()
+        return "\n".join(out).strip(), "\n".join(err).strip() or "PowerShell host exited unexpectedly."
+
+    def run(self, command: str) -> Tuple[str, str]:
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            if self.connect_error:
+                stderr = self.connect_error
+                self.close()
+                return "", stderr
+            return self._exchange(command)
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                try:
+                    self._write("exit")
+                    self._proc.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._proc.kill()
+            self._proc = None
+
+
+# One host per credential set, shared across reruns and sessions; the host serializes its own commands.
+# The cache is bounded so stale credential sets don't each keep a powershell.exe (and its runspace pool)
+# alive for the life of the server.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def ps_host(user: str, pwd_hash: str, _pwd: str) -> Five9PSHost:
+    return Five9PSHost(user, _pwd)
+
+def run_powershell_command(username: str, password: str, command: str) -> Tuple[str, str]:
+    host = ps_host(username, hash_password(password), password)
+    previous = st.session_state.get("ps_host")
+    if previous is not None and previous is not host:
+        # Credentials changed in this session; stop the old process now rather than leaving it idle.
+        # Another session still using it simply gets a fresh process on its next run().
+        previous.close()
+    st.session_state.ps_host = host
+    return host.run(command)
 
 # --- Installer and Status Functions ---
+def write_install_status(status: Dict[str, object]):
+    tmp = _INSTALL_STATUS.with_name(_INSTALL_STATUS.name + ".tmp")
+    tmp.write_text(json.dumps(status), encoding="utf-8")
+    os.replace(tmp, _INSTALL_STATUS)
+
 def start_install_detached(command: str):
-    for f in [_INSTALL_STDOUT, _INSTALL_STDERR]:
-        f.write_text("", encoding="utf-8")
-    _INSTALL_LOCK.write_text("running", encoding="utf-8")
+    # The installer reports through one status.json that both sides replace atomically (os.replace here,
+    # File.Replace in PowerShell, retried on sharing violations), so a poll never sees a half-written file.
+    write_install_status({"running": True})
+    status_path = ps_escape(str(_INSTALL_STATUS))
     wrapper_script = (
-        f"try {{ {command} | Out-File -FilePath '{_INSTALL_STDOUT}' -Encoding utf8 }} "
-        f"catch {{ $_.Exception.Message | Out-File -FilePath '{_INSTALL_STDERR}' -Encoding utf8 }}\n"
-        f"finally {{ Remove-Item -Path '{_INSTALL_LOCK}' -Force -ErrorAction SilentlyContinue }}"
+        f"$stdout = ''; $stderr = ''\n"
+        f"try {{ $stdout = ({command} | Out-String) }} catch {{ $stderr = $_.Exception.Message }}\n"
+        f"finally {{\n"
+        f"    $json = [pscustomobject]@{{ running = $false; stdout = $stdout; stderr = $stderr }} | ConvertTo-Json\n"
+        f"    [IO.File]::WriteAllText('{status_path}.tmp', $json)\n"
+        # File.Replace fails with a sharing violation while the app is reading status.json, so retry briefly
+        # before falling back to a plain move; either way the final status must land.
+        f"    $replaced = $false\n"
+        f"    for ($i = 0; $i -lt 10 -and -not $replaced; $i++) {{\n"
+        f"        try {{ [IO.File]::Replace('{status_path}.tmp', '{status_path}', $null); $replaced = $true }}\n"
+        f"        catch {{ Start-Sleep -Milliseconds 100 }}\n"
+        f"    }}\n"
+        f"    if (-not $replaced) {{ Move-Item -LiteralPath '{status_path}.tmp' -Destination '{status_path}' -Force }}\n"
+        f"}}"
     )
     script_file = _INSTALL_DIR / "install_script.ps1"
     script_file.write_text(wrapper_script, encoding="utf-8")
@@ -64,63 +225,212 @@ def start_install_detached(command: str):
     subprocess.run(ps_base_args(launch_cmd), capture_output=True, text=True, creationflags=get_creation_flags())
 
 def get_install_status() -> Dict[str, object]:
-    running = _INSTALL_LOCK.exists()
-    stdout = _INSTALL_STDOUT.read_text(encoding="utf-8").strip() if _INSTALL_STDOUT.exists() else ""
-    stderr = _INSTALL_STDERR.read_text(encoding="utf-8").strip() if _INSTALL_STDERR.exists() else ""
-    done = not running and (_INSTALL_STDOUT.exists() or _INSTALL_STDERR.exists())
-    return {"running": running, "stdout": stdout, "stderr": stderr, "done": done}
+    try:
+        status = json.loads(_INSTALL_STATUS.read_text(encoding="utf-8-sig"))
+    except (OSError, ValueError):
+        return {"running": False, "stdout": "", "stderr": "", "done": False}
+    running = bool(status.get("running"))
+    stdout, stderr = str(status.get("stdout") or "").strip(), str(status.get("stderr") or "").strip()
+    return {"running": running, "stdout": stdout, "stderr": stderr, "done": not running}
 
 # --- Data Parsing Functions ---
+class Five9CommandError(RuntimeError):
+    def __init__(self, stdout: str, stderr: str):
+        super().__init__(stderr)
+        self.stdout, self.stderr = stdout, stderr
+
+class EmptyResultError(Five9CommandError):
+    """Raised for an empty fetch so it isn't cached: the campaign script swallows per-type errors,
+    so an empty result may be a transient failure rather than an empty domain."""
+
+@st.cache_resource
+def _maps() -> Tuple[Dict[int, str], Dict[int, str]]:
+    return (
+        {0: "Not Running", 1: "Starting", 2: "Running", 3: "Stopping"},
+        {0: "Inbound", 1: "Outbound", 2: "AutoDial"},
+    )
+
+@st.cache_resource
+def _empty_frames() -> Dict[str, pd.DataFrame]:
+    # Shared templates; callers must .copy() before storing or mutating them.
+    return {
+        "campaigns": pd.DataFrame({
+            "Name": pd.Series(dtype=object), "State": pd.Series(dtype="category"),
+            "Type": pd.Series(dtype="category"), "_running": pd.Series(dtype=bool),
+        }),
+        "domain_lists": pd.DataFrame({"name": pd.Series(dtype="string[pyarrow]"), "size": pd.Series(dtype="Int64")}),
+    }
+
 def parse_json_output(raw_json: str) -> List[Dict]:
     if not raw_json: return []
     try:
-        parsed = json.loads(raw_json)
+        parsed = _json.loads(raw_json)
         return [parsed] if isinstance(parsed, dict) else parsed if isinstance(parsed, list) else []
-    except json.JSONDecodeError:
+    except _json.JSONDecodeError:
         return []
 
 def parse_campaigns_json(records: List[Dict]) -> pd.DataFrame:
-    STATE_MAP = {0: "Not Running", 1: "Starting", 2: "Running", 3: "Stopping"}
-    TYPE_MAP = {0: "Inbound", 1: "Outbound", 2: "AutoDial"}
-    normalized = []
-    for rec in records:
-        lower_rec = {k.lower(): v for k, v in rec.items()}
-        normalized.append({
-            "Name": lower_rec.get("name", ""),
-            "State": STATE_MAP.get(lower_rec.get("state"), str(lower_rec.get("state"))),
-            "Type": TYPE_MAP.get(lower_rec.get("type"), str(lower_rec.get("type")))
-        })
-    return pd.DataFrame.from_records(normalized)
-
-def parse_domain_lists_json(records: List[Dict]) -> pd.DataFrame:
+    STATE_MAP, TYPE_MAP = _maps()
     df = pd.DataFrame.from_records(records)
     if df.empty:
-        return pd.DataFrame(columns=["name", "size"])
-    return df.sort_values(by="name", ascending=True).reset_index(drop=True)
-
-def parse_action_results(records: List[Dict]) -> Tuple[List[str], Dict[str, str]]:
-    successes, failures = [], {}
-    for record in records:
-        name = str(record.get("Identifier", "(unknown)"))
-        if record.get("Success"):
-            if name not in successes: successes.append(name)
-        else:
-            failures[name] = str(record.get("Error") or "Unknown error")
-    return successes, failures
+        return _empty_frames()["campaigns"].copy()
+    df.columns = df.columns.str.lower()
+    df = df.reindex(columns=["name", "state", "type"])
+    out = pd.DataFrame({
+        "Name": df["name"].fillna(""),
+        "State": df["state"].map(STATE_MAP).fillna(df["state"].astype(str)).astype("category"),
+        "Type": df["type"].map(TYPE_MAP).fillna(df["type"].astype(str)).astype("category"),
+    })
+    # PowerShell sends the enum's string form ("Running"/"RUNNING"), so compare case-insensitively here,
+    # once per fetch, rather than on every rerun of the tab.
+    out["_running"] = (out["State"].str.lower() == "running").to_numpy(dtype=bool)
+    return out
+
+# size stays int64: a single list above the int32 range would otherwise fail the whole load.
+_DOMAIN_LIST_SCHEMA = pa.schema([("name", pa.string()), ("size", pa.int64())])
+# Keep Arrow strings Arrow-backed (string[pyarrow]) and integers nullable instead of object/float columns.
+_ARROW_DTYPES = {pa.string(): pd.StringDtype("pyarrow"), pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype()}
+
+def parse_ndjson_output(raw_ndjson: str, schema: pa.Schema) -> pd.DataFrame:
+    """Parse one-object-per-line JSON with Arrow's multithreaded reader; fields outside schema are dropped.
+    A malformed payload raises Five9CommandError carrying the raw text, so it is neither cached nor persisted."""
+    table = schema.empty_table()
+    if raw_ndjson:
+        options = paj.ParseOptions(explicit_schema=schema, unexpected_field_behavior="ignore")
+        try:
+            table = paj.read_json(io.BytesIO(raw_ndjson.encode("utf-8")), parse_options=options)
+        except pa.ArrowInvalid as exc:
+            raise Five9CommandError(raw_ndjson, f"Could not parse PowerShell output: {exc}") from exc
+    return table.to_pandas(types_mapper=_ARROW_DTYPES.get)
+
+def parse_domain_lists_json(raw_ndjson: str) -> pd.DataFrame:
+    df = parse_ndjson_output(raw_ndjson, _DOMAIN_LIST_SCHEMA)
+    if df.empty:
+        return _empty_frames()["domain_lists"].copy()
+    return df.sort_values(by="name", kind="stable", ignore_index=True)
+
+def parse_action_results(records: List[Dict]) -> Tuple[List[str], Dict[str, str], List[str]]:
+    """Split results into (successes, failures, skipped); skipped are no-op pairs that needed no Five9 call."""
+    df = pd.DataFrame.from_records(records).reindex(columns=["Identifier", "Success", "Error", "Skipped"])
+    if df.empty:
+        return [], {}, []
+    names = df["Identifier"].fillna("(unknown)").astype(str)
+    ok = df["Success"].notna() & df["Success"].astype(bool)
+    skipped = ok & df["Skipped"].notna() & df["Skipped"].astype(bool)
+    successes = names[ok & ~skipped].drop_duplicates(keep="first").tolist()
+    errors = df.loc[~ok, "Error"].fillna("").astype(str).replace("", "Unknown error")
+    return successes, dict(zip(names[~ok], errors)), names[skipped].drop_duplicates(keep="first").tolist()
+
+# --- Cached Five9 Fetches ---
+def run_checked(username: str, password: str, command: str) -> str:
+    stdout, stderr = run_powershell_command(username, password, command)
+    if stderr:
+        raise Five9CommandError(stdout, stderr)
+    return stdout
+
+# The password itself is passed as an underscore argument so Streamlit leaves it out of the cache key;
+# pwd_hash stands in for it. Failures raise, so they are never cached.
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_campaigns_df(user: str, pwd_hash: str, _pwd: str) -> Tuple[pd.DataFrame, str]:
+    cmd = """
+$all = @(); $types = @('Inbound', 'Outbound', 'Autodial'); 
+foreach ($t in $types) { try { $all += Get-Five9Campaign -Type $t } catch {} };
+$all | ForEach-Object { [pscustomobject]@{ Name = $_.name; State = $_.state.ToString(); Type = $_.type.ToString() } } | ConvertTo-Json
+"""
+    stdout = run_checked(user, _pwd, cmd)
+    df = parse_campaigns_json(parse_json_output(stdout))
+    if df.empty:
+        raise EmptyResultError(stdout, "")
+    return df, stdout
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_domain_lists_df(user: str, pwd_hash: str, _pwd: str) -> Tuple[pd.DataFrame, str]:
+    # One compressed JSON object per line (NDJSON) instead of a single document.
+    cmd = "Get-Five9List | ForEach-Object { [pscustomobject]@{ name = $_.name; size = $_.size } | ConvertTo-Json -Compress }"
+    stdout = run_checked(user, _pwd, cmd)
+    return parse_domain_lists_json(stdout), stdout
+
+@st.cache_data(ttl=30, show_spinner=False)
+def find_affected(user: str, pwd_hash: str, _pwd: str, lists_key: Tuple[str, ...], campaigns_key: Tuple[str, ...]) -> Dict[str, List[str]]:
+    """Map each campaign holding any of the selected lists to the selected lists it actually holds."""
+    find_cmd = f"""
+$allCampaigns = {_ps_array(campaigns_key)};
+$listsToFind = {_ps_array(lists_key)};
+$campaignsFound = @(Invoke-Five9Parallel -InputObject $allCampaigns -Shared $listsToFind -ScriptBlock {{
+    param($c, $listsToFind)
+    try {{
+        $listNames = [System.Collections.Generic.HashSet[string]]::new([StringComparer]::OrdinalIgnoreCase);
+        foreach ($cl in @(Get-Five9CampaignList -Name $c)) {{ $null = $listNames.Add($cl.listName) }}
+        $matched = @(foreach ($l in $listsToFind) {{ if ($listNames.Contains($l)) {{ $l }} }});
+        if ($matched.Count) {{ [pscustomobject]@{{ Campaign = $c; Lists = $matched }} }}
+    }} catch {{}}
+}});
+ConvertTo-Json -InputObject $campaignsFound -Depth 3
+"""
+    found = {}
+    for record in parse_json_output(run_checked(user, _pwd, find_cmd)):
+        if "Campaign" not in record: continue # Failed lookup job; treated like an unreadable campaign
+        lists = record.get("Lists") or []
+        found[str(record.get("Campaign"))] = lists if isinstance(lists, list) else [lists]
+    return found
 
 # --- Streamlit Session State Initialization ---
+def save_frame(df: pd.DataFrame, path: Path):
+    try:
+        df.to_parquet(path, compression="zstd", index=False)
+    except (OSError, ValueError):
+        pass # The on-disk copy is only a warm start; a failed write must not break the fetch
+
+def frame_path(kind: str, username: str) -> Path:
+    # Warm-start copies are per Five9 account, so one account's campaigns never show up for another.
+    owner = hashlib.sha256((username or "").strip().lower().encode("utf-8")).hexdigest()[:16]
+    return _INSTALL_DIR / f"{kind}-{owner}.parquet"
+
+def load_frame(path: Path, template: pd.DataFrame) -> pd.DataFrame:
+    if not path.exists(): return template
+    try:
+        df = pd.read_parquet(path)
+    except (OSError, ValueError):
+        return template
+    if not set(template.columns) <= set(df.columns): return template
+    # Parquet round-trips string[pyarrow] as string[python] and empty categoricals as object, so cast back to
+    # the template's dtypes. Template categoricals have no categories yet; "category" keeps the stored values.
+    dtypes = {c: "category" if isinstance(t, pd.CategoricalDtype) else t for c, t in template.dtypes.items()}
+    try:
+        return df.astype(dtypes)
+    except (TypeError, ValueError):
+        return template
+
 def get_default_state():
     return {
-        "campaigns_df": pd.DataFrame(columns=["Name", "State", "Type"]),
-        "domain_lists_df": pd.DataFrame(columns=["name", "size"]),
+        "campaigns_df": _empty_frames()["campaigns"],
+        "domain_lists_df": _empty_frames()["domain_lists"],
+        "data_user": "", # Account the frames above belong to
         "list_mgmt_page": 0,
-        "campaigns_with_selected_lists": [],
+        "campaigns_with_selected_lists": {},
         "last_stdout": "", "last_stderr": "", "cached_user": "", "cached_pass": "",
     }
 
-for key, value in get_default_state().items():
-    if key not in st.session_state:
-        st.session_state[key] = value
+if "campaigns_df" not in st.session_state:
+    for key, value in get_default_state().items():
+        if key not in st.session_state:
+            st.session_state[key] = value.copy() if isinstance(value, pd.DataFrame) else value
+
+# Widget option lists are derived once per data load rather than by .tolist() on every rerun.
+def set_campaigns_df(df: pd.DataFrame):
+    names, running = df["Name"].to_numpy(), df["_running"].to_numpy(dtype=bool)
+    st.session_state.campaigns_df = df
+    st.session_state.campaign_names = {
+        "All": names.tolist(), "Running": names[running].tolist(), "Not Running": names[~running].tolist(),
+    }
+
+def set_domain_lists_df(df: pd.DataFrame):
+    st.session_state.domain_lists_df = df
+    st.session_state.domain_list_names = df["name"].tolist()
+
+if "campaign_names" not in st.session_state:
+    set_campaigns_df(st.session_state.campaigns_df)
+    set_domain_lists_df(st.session_state.domain_lists_df)
 
 def get_effective_credentials(username, password, use_cached):
     if username and password: return username, password
@@ -155,18 +465,26 @@ with st.sidebar:
                 st.error("Install failed. Check Debug Console.") if status["stderr"] else st.success("Install complete.")
     
     eff_user, eff_pass = get_effective_credentials(username, password, use_cached)
+    if eff_user and st.session_state.data_user != eff_user:
+        # Data on screen belongs to no account or another one; switch to this account's last saved copy.
+        set_campaigns_df(load_frame(frame_path("campaigns", eff_user), _empty_frames()["campaigns"]).copy())
+        set_domain_lists_df(load_frame(frame_path("domain_lists", eff_user), _empty_frames()["domain_lists"]).copy())
+        st.session_state.campaigns_with_selected_lists = {}
+        st.session_state.list_mgmt_page = 0
+        st.session_state.data_user = eff_user
     if st.button("Get Campaign Status", disabled=not (eff_user and eff_pass)):
-        cmd = """
-$all = @(); $types = @('Inbound', 'Outbound', 'Autodial'); 
-foreach ($t in $types) { try { $all += Get-Five9Campaign -Type $t } catch {} };
-$all | ForEach-Object { [pscustomobject]@{ Name = $_.name; State = $_.state.ToString(); Type = $_.type.ToString() } } | ConvertTo-Json
-"""
-        stdout, stderr = run_powershell_command(eff_user, eff_pass, cmd)
-        st.session_state.last_stdout, st.session_state.last_stderr = stdout, stderr
-        if stderr: st.error("Failed to fetch campaigns.")
-        else:
-            st.session_state.campaigns_df = parse_campaigns_json(parse_json_output(stdout))
-            if st.session_state.campaigns_df.empty: st.warning("No campaigns returned.")
+        try:
+            campaigns_df, st.session_state.last_stdout = fetch_campaigns_df(eff_user, hash_password(eff_pass), eff_pass)
+            set_campaigns_df(campaigns_df)
+            save_frame(st.session_state.campaigns_df, frame_path("campaigns", eff_user))
+            st.session_state.last_stderr = ""
+        except EmptyResultError as exc:
+            set_campaigns_df(_empty_frames()["campaigns"].copy())
+            st.session_state.last_stdout, st.session_state.last_stderr = exc.stdout, exc.stderr
+            st.warning("No campaigns returned.")
+        except Five9CommandError as exc:
+            st.session_state.last_stdout, st.session_state.last_stderr = exc.stdout, exc.stderr
+            st.error("Failed to fetch campaigns.")
 
 # --- Main UI ---
 st.title("Five9 Campaign Manager")
@@ -181,9 +499,7 @@ with tab1:
         left, right = st.columns([2, 1])
         with left:
             status_choice = st.radio("Filter by State", ["Running", "Not Running"], horizontal=True)
-            running_mask = st.session_state.campaigns_df["State"].str.lower() == "running"
-            filtered_df = st.session_state.campaigns_df[running_mask if status_choice == "Running" else ~running_mask]
-            selected_campaigns = st.multiselect("Select Campaigns", filtered_df["Name"].tolist())
+            selected_campaigns = st.multiselect("Select Campaigns", st.session_state.campaign_names[status_choice])
         with right:
             action_label = "Stop Selected Campaigns" if status_choice == "Running" else "Start Selected Campaigns"
             action_color = "#d33" if status_choice == "Running" else "#1f8b4c"
@@ -195,7 +511,7 @@ with tab1:
             if st.button(action_label, disabled=not action_enabled):
                 action_cmd = "Stop-Five9Campaign -Force $true" if status_choice == "Running" else "Start-Five9Campaign"
                 ps_cmd = f"""
-$campaigns = @({', '.join([f"'{ps_escape(c)}'" for c in selected_campaigns])});
+$campaigns = {_ps_array(selected_campaigns)};
 $results = @();
 foreach ($c in $campaigns) {{
     try {{ 
@@ -209,27 +525,29 @@ $results | ConvertTo-Json -Depth 3
 """
                 stdout, stderr = run_powershell_command(eff_user, eff_pass, ps_cmd)
                 st.session_state.last_stdout, st.session_state.last_stderr = stdout, stderr
+                fetch_campaigns_df.clear() # Campaign states changed; next status fetch must hit Five9
                 if not stderr:
-                    successes, failures = parse_action_results(parse_json_output(stdout))
+                    successes, failures, _ = parse_action_results(parse_json_output(stdout))
                     if successes: st.success(f"Succeeded for: {', '.join(successes)}")
                     if failures: st.error(f"Failed for: {', '.join(failures.keys())}")
                 if auto_refresh: st.rerun()
 
     st.header("All Campaigns")
-    st.dataframe(st.session_state.campaigns_df, use_container_width=True)
+    st.dataframe(st.session_state.campaigns_df, use_container_width=True, column_config={"_running": None})
 
 with tab2:
     st.header("Manage Campaign Lists")
     if st.button("Load All Domain Lists", disabled=not (eff_user and eff_pass)):
         with st.spinner("Fetching all lists from the domain..."):
-            cmd = "@(Get-Five9List) | ConvertTo-Json -Depth 3"
-            stdout, stderr = run_powershell_command(eff_user, eff_pass, cmd)
-            st.session_state.last_stdout, st.session_state.last_stderr = stdout, stderr
-            if stderr:
-                st.error("Failed to fetch domain lists.")
-            else:
-                st.session_state.domain_lists_df = parse_domain_lists_json(parse_json_output(stdout))
+            try:
+                domain_lists_df, st.session_state.last_stdout = fetch_domain_lists_df(eff_user, hash_password(eff_pass), eff_pass)
+                set_domain_lists_df(domain_lists_df)
+                save_frame(st.session_state.domain_lists_df, frame_path("domain_lists", eff_user))
+                st.session_state.last_stderr = ""
                 st.session_state.list_mgmt_page = 0 # Reset page on new load
+            except Five9CommandError as exc:
+                st.session_state.last_stdout, st.session_state.last_stderr = exc.stdout, exc.stderr
+                st.error("Failed to fetch domain lists.")
 
     if not st.session_state.domain_lists_df.empty:
         st.markdown("---")
@@ -239,9 +557,10 @@ with tab2:
         page_size = 10
         df = st.session_state.domain_lists_df
         page = st.session_state.list_mgmt_page
-        total_pages = int(np.ceil(len(df) / page_size))
+        total_pages = max(1, -(-len(df) // page_size))
+        start = page * page_size
         
-        st.dataframe(df.iloc[page*page_size : (page+1)*page_size], use_container_width=True)
+        st.dataframe(df.iloc[start : start + page_size], use_container_width=True)
         
         p_col1, p_col2, p_col3 = st.columns([1, 8, 1])
         if p_col1.button("◀ Previous", disabled=(page <= 0)):
@@ -257,85 +576,100 @@ with tab2:
 
         if action_choice == "Add Lists to Campaigns":
             st.subheader("Add Lists")
-            lists_to_add = st.multiselect("1. Select Lists to Add", df["name"].tolist())
-            campaigns_to_add_to = st.multiselect("2. Select Target Campaigns", st.session_state.campaigns_df["Name"].tolist())
+            lists_to_add = st.multiselect("1. Select Lists to Add", st.session_state.domain_list_names)
+            campaigns_to_add_to = st.multiselect("2. Select Target Campaigns", st.session_state.campaign_names["All"])
             
             if st.button("Execute Add Operation", disabled=not(lists_to_add and campaigns_to_add_to)):
                 cmd = f"""
-$lists = @({', '.join([f"'{ps_escape(l)}'" for l in lists_to_add])});
-$campaigns = @({', '.join([f"'{ps_escape(c)}'" for c in campaigns_to_add_to])});
-$results = @();
-foreach ($c in $campaigns) {{ foreach ($l in $lists) {{
-    try {{
-        Add-Five9CampaignList -CampaignName $c -ListName $l;
-        $results += [pscustomobject]@{{Identifier="$c -> $l"; Success=$true}}
-    }} catch {{
-        $results += [pscustomobject]@{{Identifier="$c -> $l"; Success=$false; Error=$_.Exception.Message}}
+$lists = {_ps_array(lists_to_add)};
+$campaigns = {_ps_array(campaigns_to_add_to)};
+$results = @(Invoke-Five9Parallel -InputObject $campaigns -Shared $lists -ScriptBlock {{
+    param($c, $lists)
+    $existing = [System.Collections.Generic.HashSet[string]]::new([StringComparer]::OrdinalIgnoreCase);
+    try {{ foreach ($cl in @(Get-Five9CampaignList -Name $c)) {{ $null = $existing.Add($cl.listName) }} }} catch {{}}
+    foreach ($l in $lists) {{
+        if ($existing.Contains($l)) {{
+            [pscustomobject]@{{Identifier="$c -> $l"; Success=$true; Skipped=$true}}
+            continue
+        }}
+        try {{
+            Add-Five9CampaignList -CampaignName $c -ListName $l | Out-Null;
+            [pscustomobject]@{{Identifier="$c -> $l"; Success=$true}}
+        }} catch {{
+            [pscustomobject]@{{Identifier="$c -> $l"; Success=$false; Error=$_.Exception.Message}}
+        }}
     }}
-}} }};
+}});
 $results | ConvertTo-Json -Depth 3
 """
                 with st.spinner("Adding lists..."):
                     stdout, stderr = run_powershell_command(eff_user, eff_pass, cmd)
                     st.session_state.last_stdout, st.session_state.last_stderr = stdout, stderr
+                    find_affected.clear() # Campaign list membership changed
                     if not stderr:
-                        successes, failures = parse_action_results(parse_json_output(stdout))
-                        if successes: st.success(f"{len(successes)} add operations succeeded.")
+                        successes, failures, skipped = parse_action_results(parse_json_output(stdout))
+                        if successes or skipped:
+                            st.success(f"{len(successes)} added, {len(skipped)} already attached.")
                         if failures: 
                             st.error(f"{len(failures)} add operations failed. See details below.")
                             for ident, err in failures.items(): st.warning(f"- {ident}: {err}")
 
         elif action_choice == "Remove Lists from Campaigns":
             st.subheader("Remove Lists")
-            lists_to_remove = st.multiselect("1. Select Lists to Remove", df["name"].tolist(), key="lists_to_remove_selector")
+            # Inside a form the selection only takes effect on submit, so picking lists no longer
+            # triggers a Five9 lookup on every rerun.
+            with st.form("find_form"):
+                lists_to_remove = st.multiselect("1. Select Lists to Remove", st.session_state.domain_list_names, key="lists_to_remove_selector")
+                submitted = st.form_submit_button("Find affected campaigns", disabled=not (eff_user and eff_pass))
+
+            if submitted:
+                st.session_state.campaigns_with_selected_lists = {}
+                if lists_to_remove:
+                    with st.spinner("Finding campaigns containing selected lists..."):
+                        try:
+                            st.session_state.campaigns_with_selected_lists = find_affected(
+                                eff_user, hash_password(eff_pass), eff_pass,
+                                tuple(sorted(lists_to_remove)), tuple(st.session_state.campaign_names["All"]),
+                            )
+                        except Five9CommandError as exc:
+                            st.session_state.last_stdout, st.session_state.last_stderr = exc.stdout, exc.stderr
+                            st.error("Failed to find campaigns containing the selected lists.")
 
             if lists_to_remove:
-                # Find campaigns that contain the selected lists
-                with st.spinner("Finding campaigns containing selected lists..."):
-                    find_cmd = f"""
-$allCampaigns = @({', '.join([f"'{ps_escape(c)}'" for c in st.session_state.campaigns_df['Name'].tolist()])});
-$listsToFind = @({', '.join([f"'{ps_escape(l)}'" for l in lists_to_remove])});
-$campaignsFound = @();
-foreach ($c in $allCampaigns) {{
-    try {{
-        $campaignLists = @(Get-Five9CampaignList -Name $c);
-        $listNames = $campaignLists | Select-Object -ExpandProperty listName;
-        foreach($l in $listsToFind) {{
-            if ($l -in $listNames) {{
-                $campaignsFound += $c;
-                break;
-            }}
-        }}
-    }} catch {{}}
-}};
-$campaignsFound | Select-Object -Unique | ConvertTo-Json
-"""
-                    stdout, stderr = run_powershell_command(eff_user, eff_pass, find_cmd)
-                    if not stderr:
-                        st.session_state.campaigns_with_selected_lists = parse_json_output(stdout)
-
-                campaigns_to_remove_from = st.multiselect("2. Select Campaigns to Remove From", st.session_state.campaigns_with_selected_lists)
+                campaigns_to_remove_from = st.multiselect("2. Select Campaigns to Remove From", list(st.session_state.campaigns_with_selected_lists), key="campaigns_to_remove_selector")
                 
                 if st.button("Execute Remove Operation", disabled=not campaigns_to_remove_from):
+                    # Only the pairs the lookup actually found; the rest would be no-op Five9 calls.
+                    plan = {c: st.session_state.campaigns_with_selected_lists[c] for c in campaigns_to_remove_from}
                     cmd = f"""
-$lists = @({', '.join([f"'{ps_escape(l)}'" for l in lists_to_remove])});
-$campaigns = @({', '.join([f"'{ps_escape(c)}'" for c in campaigns_to_remove_from])});
-$results = @();
-foreach ($c in $campaigns) {{ foreach ($l in $lists) {{
-    try {{
-        Remove-Five9CampaignList -CampaignName $c -ListName $l;
-        $results += [pscustomobject]@{{Identifier="$c -> $l"; Success=$true}}
-    }} catch {{
-        $results += [pscustomobject]@{{Identifier="$c -> $l"; Success=$false; Error=$_.Exception.Message}}
+$plan = {_ps_hashtable(plan)};
+$results = @(Invoke-Five9Parallel -InputObject @($plan.Keys) -Shared $plan -ScriptBlock {{
+    param($c, $plan)
+    foreach ($l in $plan[$c]) {{
+        try {{
+            Remove-Five9CampaignList -CampaignName $c -ListName $l | Out-Null;
+            [pscustomobject]@{{Identifier="$c -> $l"; Success=$true}}
+        }} catch {{
+            [pscustomobject]@{{Identifier="$c -> $l"; Success=$false; Error=$_.Exception.Message}}
+        }}
     }}
-}} }};
+}});
 $results | ConvertTo-Json -Depth 3
 """
                     with st.spinner("Removing lists..."):
                         stdout, stderr = run_powershell_command(eff_user, eff_pass, cmd)
                         st.session_state.last_stdout, st.session_state.last_stderr = stdout, stderr
+                        find_affected.clear() # Campaign list membership changed
                         if not stderr:
-                            successes, failures = parse_action_results(parse_json_output(stdout))
+                            successes, failures, _ = parse_action_results(parse_json_output(stdout))
+                            # Drop the removed pairs so the next rerun doesn't offer them again.
+                            removed, mapping = set(successes), st.session_state.campaigns_with_selected_lists
+                            for c, lists in plan.items():
+                                remaining = [l for l in lists if f"{c} -> {l}" not in removed]
+                                if remaining: mapping[c] = remaining
+                                else: mapping.pop(c, None)
+                            if "campaigns_to_remove_selector" in st.session_state:
+                                del st.session_state["campaigns_to_remove_selector"]
                             if successes: st.success(f"{len(successes)} remove operations succeeded.")
                             if failures: 
                                 st.error(f"{len(failures)} remove operations failed. See details below.")